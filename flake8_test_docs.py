@@ -5,16 +5,10 @@ from __future__ import annotations
 import argparse
 import ast
 import re
-import sys
-from functools import wraps
-from pathlib import Path
-from typing import Callable, Iterator, NamedTuple
-
-# Can't cover both paths of a conditional import
-if sys.version_info < (3, 10):
-    from typing_extensions import ParamSpec  # pragma: nocover
-else:
-    from typing import ParamSpec  # pragma: nocover
+from collections import deque
+from functools import lru_cache
+from os.path import basename
+from typing import Iterator, NamedTuple, cast
 
 from flake8.options.manager import OptionManager
 
@@ -26,6 +20,7 @@ MISSING_MSG = (
     f"{MORE_INFO_BASE}#fix-{MISSING_CODE.lower()}"
 )
 INVALID_CODE = f"{ERROR_CODE_PREFIX}002"
+INVALID_MSG_PREFIX = f"{INVALID_CODE} "
 INVALID_MSG_POSTFIX = f", {MORE_INFO_BASE}#fix-{INVALID_CODE.lower()}"
 TEST_DOCS_PATTERN_ARG_NAME = "--test-docs-pattern"
 TEST_DOCS_PATTERN_DEFAULT = "arrange/act/assert"
@@ -38,6 +33,9 @@ INDENT_SIZE_DEFAULT = 4
 ARRANGE_DESCRIPTION = "setup"
 ACT_DESCRIPTION = "execution"
 ASSERT_DESCRIPTION = "checks"
+_LITERAL_PREFIX_PATTERN = re.compile(r"([A-Za-z0-9_]+)\.\*")
+# The fields of the nodes that contain the nodes function definitions can be nested in
+_STATEMENT_CONTAINER_FIELDS = ("body", "handlers", "orelse", "finalbody", "cases")
 
 
 # Helper function for option management, tested in integration tests
@@ -71,175 +69,232 @@ class Section(NamedTuple):
     """Information about a section.
 
     Attrs:
-        index_: The index of the first line of the section in the docstring.
         name: A short description of the section.
+        label: The name of the section followed by a colon which starts the section.
         description: What the section does.
         next_section_name: The name of the next section or None if it is the last section.
     """
 
-    index_: int
     name: str
+    label: str
     description: str
     next_section_name: str | None
 
 
-AIMPPParamSpec = ParamSpec("AIMPPParamSpec")
+@lru_cache(maxsize=None)
+def _docs_pattern_sections(docs_pattern: DocsPattern) -> tuple[Section, ...]:
+    """Calculate the information about each section of the docs pattern.
+
+    The docs pattern does not change during a run, so the sections are only created once rather
+    than for every docstring.
+
+    Args:
+        docs_pattern: The pattern the docstring should follow.
+
+    Returns:
+        The information about each section.
+    """
+    return tuple(
+        Section(name=name, label=f"{name}:", description=description, next_section_name=next_name)
+        for name, description, next_name in zip(
+            docs_pattern,
+            (ARRANGE_DESCRIPTION, ACT_DESCRIPTION, ASSERT_DESCRIPTION),
+            (*docs_pattern[1:], None),
+        )
+    )
+
 
+@lru_cache(maxsize=64)
+def _prefixes(col_offset: int, indent_size: int) -> tuple[str, str]:
+    """Calculate the expected prefixes of the section and description lines.
 
-def _append_invalid_msg_prefix_postfix(
-    func: Callable[AIMPPParamSpec, str | None]
-) -> Callable[AIMPPParamSpec, str | None]:
-    """Add the code prefix and invalid message postfix to the return value.
+    Docstrings are almost always at the same few column offsets, so the result is cached.
 
     Args:
-        func: The function to wrap.
+        col_offset: The column offset where the docstring definition starts.
+        indent_size: The number of indentation characters.
 
     Returns:
-        The wrapped function.
+        The prefix expected at the start of a section and at the start of a description line.
     """
+    section_prefix = " " * col_offset
+    return section_prefix, f"{section_prefix}{' ' * indent_size}"
 
-    @wraps(func)
-    def wrapper(*args: AIMPPParamSpec.args, **kwargs: AIMPPParamSpec.kwargs) -> str | None:
-        """Wrap the function.
 
-        Args:
-            args: The function arguments.
-            kwargs: The function kwargs.
+def _line_end(docstring: str, line_start: int) -> int:
+    """Find the end of a line in the docstring.
 
-        Returns:
-            The function return value with the code and postfix added.
-        """
-        if (return_value := func(*args, **kwargs)) is None:
-            return None
-        return f"{INVALID_CODE} {return_value}{INVALID_MSG_POSTFIX}"
+    Args:
+        docstring: The docstring the line is in.
+        line_start: The index of the first character of the line in the docstring.
 
-    return wrapper
+    Returns:
+        The index in the docstring just past the last character of the line.
+    """
+    if (line_end := docstring.find("\n", line_start)) == -1:
+        return len(docstring)
+    return line_end
 
 
-def _section_start_problem_message(
-    line: str, section: Section, col_offset: int, section_prefix: str
+def _section_start_problem_message(  # pylint: disable=too-many-arguments
+    docstring: str,
+    line_start: int,
+    line_end: int,
+    section: Section,
+    section_index: int,
+    section_prefix: str,
 ) -> str | None:
     """Check the first line of a section.
 
     Args:
-        line: The line to check
+        docstring: The docstring the line is in.
+        line_start: The index of the first character of the line in the docstring.
+        line_end: The index just past the last character of the line in the docstring.
         section: Information about the section.
-        col_offset: The column offset where the docstring definition starts.
+        section_index: The index of the first line of the section in the docstring.
         section_prefix: The prefix expected at the start of a section.
 
     Returns:
         The problem description if the line has problems or None.
     """
-    if not line:
+    name_start = line_start + len(section_prefix)
+    label = section.label
+    # The line is valid if it is the prefix and label followed by a description, the remaining
+    # checks only run to work out what the problem is
+    if (
+        docstring.startswith(section_prefix, line_start, line_end)
+        and docstring.startswith(label, name_start, line_end)
+        and line_end > name_start + len(label)
+    ):
+        return None
+
+    # A line starting at the end of the docstring means the docstring ended before the section
+    if line_start == line_end < len(docstring):
         return (
             "there should only be a single empty line at the start of the docstring, found an "
-            f"empty line on line {section.index_}"
+            f"empty line on line {section_index}"
         )
-    if section.name not in line:
+    if docstring.find(section.name, line_start, line_end) == -1:
         return (
             f'the docstring should include "{section.name}" describing the test '
-            f"{section.description} on line {section.index_} of the docstring"
+            f"{section.description} on line {section_index} of the docstring"
         )
-    if not line.startswith(section_prefix):
+    if not docstring.startswith(section_prefix, line_start, line_end):
         return (
-            f"the indentation of line {section.index_} of the docstring should match the "
+            f"the indentation of line {section_index} of the docstring should match the "
             "indentation of the docstring"
         )
-    if not line[col_offset:].startswith(f"{section.name}:"):
-        return f'line {section.index_} of the docstring should start with "{section.name}:"'
-    if not line[col_offset + len(section.name) + 1 :]:
-        return (
-            f'"{section.name}:" should be followed by a description of the test '
-            f"{section.description} on line {section.index_} of the docstring"
-        )
-
-    return None
-
-
-def _next_section_start(line: str, next_section_name: str | None, section_prefix: str) -> bool:
-    """Detect whether the line is the start of the next section.
-
-    The next section is defined to be either that the line starts with the next section name after
-    any whitespace or that the line starts with exactly the number of or fewer whitespace
-    characters expected for a new section.
-
-    Args:
-        line: The line to check.
-        next_section_name: The name of the next section or None if it is the last section.
-        section_prefix: The prefix expected at the start of a section.
-
-    Returns:
-        Whether the line is the start of the next section.
-    """
-    if next_section_name is not None and line.strip().startswith(next_section_name):
-        return True
-
-    if len(line) < len(section_prefix) and line.count(" ") == len(line):
-        return True
-
-    if line.startswith(section_prefix) and not line[len(section_prefix) :].startswith(" "):
-        return True
-
-    return False
+    if not docstring.startswith(label, name_start, line_end):
+        return f'line {section_index} of the docstring should start with "{label}"'
+    return (
+        f'"{label}" should be followed by a description of the test '
+        f"{section.description} on line {section_index} of the docstring"
+    )
 
 
-def _remaining_description_problem_message(
+def _remaining_description_problem_message(  # pylint: disable=too-many-arguments,too-many-locals
+    docstring: str,
+    line_start: int,
     section: Section,
-    docstring_lines: list[str],
+    section_index: int,
     section_prefix: str,
     description_prefix: str,
-    indent_size: int,
-) -> tuple[str | None, int]:
+) -> tuple[str | None, int, int]:
     """Check the remaining description of a section after the first line.
 
+    The next section starts either on a line that starts with the next section name after any
+    whitespace or on a line that starts with exactly the number of or fewer whitespace characters
+    expected for a new section.
+
     Args:
+        docstring: The docstring the section is in.
+        line_start: The index in the docstring of the line after the first line of the section.
         section: Information about the section.
-        docstring_lines: All the lines of the docstring.
+        section_index: The index of the first line of the section in the docstring.
         section_prefix: The prefix expected at the start of a section.
         description_prefix: The prefix expected at the start of description line.
-        indent_size: The number of indentation characters.
 
     Returns:
-        The problem message if there is a problem or None and the index of the start index of the
-        next section.
+        The problem message if there is a problem or None, the line index of the start of the next
+        section and the index in the docstring of the first character of that line.
     """
-    line_index = section.index_ + 1
-    for line_index in range(line_index, len(docstring_lines)):
-        line = docstring_lines[line_index]
-
-        if not line:
-            return (
+    docstring_length = len(docstring)
+    section_prefix_length = len(section_prefix)
+    description_prefix_length = len(description_prefix)
+    next_section_name = section.next_section_name
+    line_index = section_index + 1
+    # The loop runs for every description line, so the end of the line is found inline
+    while line_start < docstring_length:
+        if (line_end := docstring.find("\n", line_start)) == -1:
+            line_end = docstring_length
+
+        if line_start == line_end:
+            problem = (
                 f"there should not be an empty line in the test {section.description} description "
                 f"on line {line_index} of the docstring"
-            ), line_index
-
-        # Detecting the start of the next section
-        if _next_section_start(
-            line=line, next_section_name=section.next_section_name, section_prefix=section_prefix
-        ):
-            break
+            )
+            return problem, line_index, line_start
+
+        # Most lines are description lines, for which the indentation checks for the start of the
+        # next section are implied, the indentation can't be checked for an indent size of 0
+        is_description = (
+            description_prefix_length > section_prefix_length
+            and docstring.startswith(description_prefix, line_start, line_end)
+            and not docstring.startswith(" ", line_start + description_prefix_length, line_end)
+        )
+        if not is_description:
+            # Detecting the start of the next section based on the indentation
+            if docstring.startswith(section_prefix, line_start, line_end):
+                if not docstring.startswith(" ", line_start + section_prefix_length, line_end):
+                    break
+            # A line starting with the prefix can't be shorter than the prefix
+            elif (line_length := line_end - line_start) < section_prefix_length and (
+                docstring.count(" ", line_start, line_end) == line_length
+            ):
+                break
+        # Detecting the start of the next section based on the name, only a line that includes the
+        # name needs the characters before the name checked
+        if next_section_name is not None:
+            name_index = docstring.find(next_section_name, line_start, line_end)
+            if name_index == line_start or (
+                name_index != -1 and docstring[line_start:name_index].isspace()
+            ):
+                break
 
-        if not line.startswith(description_prefix) or line[len(description_prefix) :].startswith(
-            " "
-        ):
-            return (
+        if not is_description:
+            problem = (
                 f"test {section.description} description on line {line_index} should be indented "
-                f'by {indent_size} more spaces than "{section.name}:" on line {section.index_}'
-            ), line_index
+                f"by {description_prefix_length - section_prefix_length} more spaces than "
+                f'"{section.label}" on line {section_index}'
+            )
+            return problem, line_index, line_start
+
+        # The last line check is done on the last line of the docstring
+        if line_end + 1 >= docstring_length:
+            break
+        line_index += 1
+        line_start = line_end + 1
 
-    return None, line_index
+    return None, line_index, line_start
 
 
-@_append_invalid_msg_prefix_postfix
+@lru_cache(maxsize=4096)
 def _docstring_problem_message(
-    docstring: str, col_offset: int, docs_pattern: DocsPattern, indent_size: int
+    docstring: str,
+    col_offset: int,
+    sections: tuple[Section, ...],
+    indent_size: int,
 ) -> str | None:
     """Get the problem message for a docstring.
 
+    The lines are located by their indexes in the docstring rather than split into separate
+    strings to avoid allocating a string per line. The result only depends on the arguments, so it
+    is cached for docstrings that are repeated across tests.
+
     Args:
         docstring: The docstring to check.
         col_offset: The column offset where the docstring definition starts.
-        docs_pattern: The pattern the docstring should follow.
+        sections: The information about each section of the pattern the docstring should follow.
         indent_size: The number of indentation characters.
 
     Returns:
@@ -248,45 +303,46 @@ def _docstring_problem_message(
     if not docstring:
         return "the docstring should not be empty"
 
-    if not docstring.startswith("\n"):
+    if docstring[0] != "\n":
         return "the docstring should start with an empty line"
 
-    docstring_lines = docstring.splitlines()
-    section_prefix = " " * col_offset
-    description_prefix = f"{section_prefix}{' ' * indent_size}"
+    section_prefix, description_prefix = _prefixes(col_offset, indent_size)
 
-    sections = zip(
-        docs_pattern,
-        (ARRANGE_DESCRIPTION, ACT_DESCRIPTION, ASSERT_DESCRIPTION),
-        (*docs_pattern[1:], None),
-    )
     section_index = 1
-    for section_name, section_description, next_section_name in sections:
-        section = Section(
-            index_=section_index,
-            name=section_name,
-            description=section_description,
-            next_section_name=next_section_name,
-        )
+    line_start = 1
+    for section in sections:
+        line_end = _line_end(docstring, line_start)
         start_problem = _section_start_problem_message(
-            line=docstring_lines[section.index_],
+            docstring=docstring,
+            line_start=line_start,
+            line_end=line_end,
             section=section,
-            col_offset=col_offset,
+            section_index=section_index,
             section_prefix=section_prefix,
         )
         if start_problem is not None:
             return start_problem
-        description_problem, section_index = _remaining_description_problem_message(
+        (
+            description_problem,
+            section_index,
+            line_start,
+        ) = _remaining_description_problem_message(
+            docstring=docstring,
+            line_start=line_end + 1,
             section=section,
-            docstring_lines=docstring_lines,
+            section_index=section_index,
             section_prefix=section_prefix,
             description_prefix=description_prefix,
-            indent_size=indent_size,
         )
         if description_problem is not None:
             return description_problem
 
-    if len(docstring_lines) <= section_index or docstring_lines[section_index] != section_prefix:
+    line_end = _line_end(docstring, line_start)
+    if (
+        line_start >= len(docstring)
+        or line_end - line_start != col_offset
+        or not docstring.startswith(section_prefix, line_start)
+    ):
         return (
             f"the indentation of the last line of the docstring at line {section_index} should "
             "match the indentation of the docstring"
@@ -295,82 +351,109 @@ def _docstring_problem_message(
     return None
 
 
-class Problem(NamedTuple):
-    """Represents a problem within the code.
+def _literal_prefix(pattern: re.Pattern[str]) -> str | None:
+    """Calculate the literal prefix that matching a pattern is equivalent to checking.
 
-    Attrs:
-        lineno: The line number the problem occurred on
-        col_offset: The column the problem occurred on
-        msg: The message explaining the problem
-    """
+    Patterns like test_.* match a name if and only if it starts with the literal before the .*,
+    which is cheaper to check with str.startswith than by running the pattern.
+
+    Args:
+        pattern: The pattern to calculate the prefix for.
 
-    lineno: int
-    col_offset: int
-    msg: str
+    Returns:
+        The literal prefix if the pattern only checks a literal prefix, otherwise None.
+    """
+    if (literal_prefix_match := _LITERAL_PREFIX_PATTERN.fullmatch(pattern.pattern)) is None:
+        return None
+    return literal_prefix_match.group(1)
 
 
 class Visitor(ast.NodeVisitor):
     """Visits AST nodes and check docstrings of test functions.
 
     Attrs:
-        problems: All the problems that were encountered.
+        problems: The line number, column offset and message of all the problems that were
+            encountered.
     """
 
-    problems: list[Problem]
-    _test_docs_pattern: DocsPattern
-    _test_function_pattern: str
+    problems: list[tuple[int, int, str]]
+    _test_docs_sections: tuple[Section, ...]
+    _test_function_pattern: re.Pattern[str]
+    _test_function_prefix: str | None
     _indent_size: int
 
     def __init__(
-        self, test_docs_pattern: DocsPattern, test_function_pattern: str, indent_size: int
+        self,
+        test_docs_pattern: DocsPattern,
+        test_function_pattern: re.Pattern[str],
+        indent_size: int,
     ) -> None:
         """Construct.
 
         Args:
             test_docs_pattern: The pattern to identify test files with.
-            test_function_pattern: The pattern to identify test functions with.
+            test_function_pattern: The compiled pattern to identify test functions with.
             indent_size: The number of spaces in indentation.
         """
         self.problems = []
-        self._test_docs_pattern = test_docs_pattern
+        self._test_docs_sections = _docs_pattern_sections(test_docs_pattern)
         self._test_function_pattern = test_function_pattern
+        self._test_function_prefix = _literal_prefix(test_function_pattern)
         self._indent_size = indent_size
 
+    def visit(self, node: ast.AST) -> None:
+        """Visit all the function definition nodes within the node.
+
+        The tree is walked directly rather than using the ast.NodeVisitor dispatch, which looks up
+        a visit method by name for every node even though only function definitions are checked.
+        Only the fields that contain statements are descended into since function definitions can't
+        be nested anywhere else.
+
+        Args:
+            node: The module or statement node to start from.
+        """
+        nodes = deque((node,))
+        while nodes:
+            current = nodes.popleft()
+            if isinstance(current, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                self.visit_FunctionDef(current)
+            for field in _STATEMENT_CONTAINER_FIELDS:
+                nodes.extend(getattr(current, field, ()))
+
     # The function must be called the same as the name of the node
-    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:  # pylint: disable=invalid-name
-        """Visit all FunctionDef nodes.
+    def visit_FunctionDef(  # pylint: disable=invalid-name
+        self, node: ast.FunctionDef | ast.AsyncFunctionDef
+    ) -> None:
+        """Visit all FunctionDef and AsyncFunctionDef nodes.
 
         Args:
-            node: The FunctionDef node.
+            node: The FunctionDef or AsyncFunctionDef node.
         """
-        if re.match(self._test_function_pattern, node.name):
-            # need checks to be in one expression so that mypy works
-            if (
-                not node.body  # pylint: disable=too-many-boolean-expressions
-                or not isinstance(node.body, list)
-                or not isinstance(node.body[0], ast.Expr)
-                or not hasattr(node.body[0], "value")
-                or not isinstance(node.body[0].value, ast.Constant)
-                or not isinstance(node.body[0].value.value, str)
-            ):
-                self.problems.append(Problem(node.lineno, node.col_offset, MISSING_MSG))
-            else:
-                if problem_message := _docstring_problem_message(
-                    node.body[0].value.value,
-                    node.body[0].value.col_offset,
-                    self._test_docs_pattern,
-                    indent_size=self._indent_size,
-                ):
-                    self.problems.append(
-                        Problem(
-                            node.body[0].value.lineno,
-                            node.body[0].value.col_offset,
-                            problem_message,
-                        )
-                    )
-
-        # Ensure recursion continues
-        self.generic_visit(node)
+        if self._test_function_prefix is not None:
+            if not node.name.startswith(self._test_function_prefix):
+                return
+        elif not self._test_function_pattern.match(node.name):
+            return
+
+        if (docstring := ast.get_docstring(node, clean=False)) is None:
+            self.problems.append((node.lineno, node.col_offset, MISSING_MSG))
+            return
+
+        # A docstring is only returned if the first statement is an expression
+        docstring_node = cast(ast.Expr, node.body[0]).value
+        if problem_message := _docstring_problem_message(
+            docstring,
+            docstring_node.col_offset,
+            self._test_docs_sections,
+            indent_size=self._indent_size,
+        ):
+            self.problems.append(
+                (
+                    docstring_node.lineno,
+                    docstring_node.col_offset,
+                    f"{INVALID_MSG_PREFIX}{problem_message}{INVALID_MSG_POSTFIX}",
+                )
+            )
 
 
 class Plugin:
@@ -382,8 +465,8 @@ class Plugin:
 
     name = __name__
     _test_docs_pattern: DocsPattern = DocsPattern(*TEST_DOCS_PATTERN_DEFAULT.split("/"))
-    _test_docs_filename_pattern: str = TEST_DOCS_FILENAME_PATTERN_DEFAULT
-    _test_docs_function_pattern: str = TEST_DOCS_FUNCTION_PATTERN_DEFAULT
+    _test_docs_filename_pattern: re.Pattern[str] = re.compile(TEST_DOCS_FILENAME_PATTERN_DEFAULT)
+    _test_docs_function_pattern: re.Pattern[str] = re.compile(TEST_DOCS_FUNCTION_PATTERN_DEFAULT)
     _indent_size: int = INDENT_SIZE_DEFAULT
     _filename: str
 
@@ -469,13 +552,14 @@ class Plugin:
             or TEST_DOCS_PATTERN_DEFAULT
         )
         cls._test_docs_pattern = DocsPattern(*test_docs_pattern_arg.split("/"))
-        cls._test_docs_filename_pattern = (
+        # The patterns are compiled once here rather than on every file and function checked
+        cls._test_docs_filename_pattern = re.compile(
             getattr(options, _cli_arg_name_to_attr(TEST_DOCS_FILENAME_PATTERN_ARG_NAME), None)
-            or cls._test_docs_filename_pattern
+            or TEST_DOCS_FILENAME_PATTERN_DEFAULT
         )
-        cls._test_docs_function_pattern = (
+        cls._test_docs_function_pattern = re.compile(
             getattr(options, _cli_arg_name_to_attr(TEST_DOCS_FUNCTION_PATTERN_ARG_NAME), None)
-            or cls._test_docs_function_pattern
+            or TEST_DOCS_FUNCTION_PATTERN_DEFAULT
         )
         cls._indent_size = (
             getattr(options, _cli_arg_name_to_attr(INDENT_SIZE_ARN_NAME), None) or cls._indent_size
@@ -487,14 +571,14 @@ class Plugin:
         Yields:
             All the issues that were found.
         """
-        if not re.match(self._test_docs_filename_pattern, Path(self._filename).name):
+        if not self._test_docs_filename_pattern.match(basename(self._filename)):
             return
 
         visitor = Visitor(
             self._test_docs_pattern, self._test_docs_function_pattern, self._indent_size
         )
         visitor.visit(self._tree)
+        plugin_type = type(self)
         yield from (
-            (problem.lineno, problem.col_offset, problem.msg, type(self))
-            for problem in visitor.problems
+            (lineno, col_offset, msg, plugin_type) for lineno, col_offset, msg in visitor.problems
         )
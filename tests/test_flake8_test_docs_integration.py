@@ -1,10 +1,14 @@
 """Integration tests for plugin."""
 
+from __future__ import annotations
+
 import subprocess
 import sys
 from pathlib import Path
+from typing import Callable, Sequence
 
 import pytest
+from flake8.main import cli as flake8_cli
 
 from flake8_test_docs import (
     INDENT_SIZE_ARN_NAME,
@@ -14,27 +18,31 @@ from flake8_test_docs import (
     TEST_DOCS_FILENAME_PATTERN_ARG_NAME,
     TEST_DOCS_FUNCTION_PATTERN_ARG_NAME,
     TEST_DOCS_PATTERN_ARG_NAME,
+    Plugin,
 )
 
+Flake8Runner = Callable[[Sequence[str]], "tuple[str, int]"]
+# The docstrings of the test code don't follow the pydocstyle conventions
+_IGNORE_ARGS = ("--ignore", "D205,D400,D103")
+
 
-def test_help():
+def test_help(capsys: pytest.CaptureFixture[str]):
     """
     given: linter
     when: the flake8 help message is generated
     then: plugin is registered with flake8
     """
-    with subprocess.Popen(
-        f"{sys.executable} -m flake8 --help",
-        stdout=subprocess.PIPE,
-        shell=True,
-    ) as proc:
-        stdout = proc.communicate()[0].decode(encoding="utf-8")
+    # The help is generated in process since it exits before any files are linted
+    with pytest.raises(SystemExit) as exc_info:
+        flake8_cli.main(["--help"])
 
-        assert "flake8-test-docs" in stdout
-        assert TEST_DOCS_PATTERN_ARG_NAME in stdout
-        assert TEST_DOCS_FILENAME_PATTERN_ARG_NAME in stdout
-        assert TEST_DOCS_FUNCTION_PATTERN_ARG_NAME in stdout
-        assert INDENT_SIZE_ARN_NAME in stdout
+    assert not exc_info.value.code
+    stdout = capsys.readouterr().out
+    assert "flake8-test-docs" in stdout
+    assert TEST_DOCS_PATTERN_ARG_NAME in stdout
+    assert TEST_DOCS_FILENAME_PATTERN_ARG_NAME in stdout
+    assert TEST_DOCS_FUNCTION_PATTERN_ARG_NAME in stdout
+    assert INDENT_SIZE_ARN_NAME in stdout
 
 
 def create_code_file(code: str, filename: str, base_path: Path) -> Path:
@@ -52,7 +60,65 @@ def create_code_file(code: str, filename: str, base_path: Path) -> Path:
     return code_file
 
 
-def test_fail(tmp_path: Path):
+@pytest.fixture(name="run_flake8")
+def fixture_run_flake8(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> Flake8Runner:
+    """Run flake8 in process rather than paying for an interpreter start per run.
+
+    flake8 records the plugin options on the Plugin class, so they are restored after the
+    test.
+
+    Args:
+        monkeypatch: Used to restore the plugin options.
+        capsys: Used to capture the flake8 output.
+
+    Returns:
+        Function that runs flake8 with the arguments and returns the stdout and exit code.
+    """
+    for name in (
+        "_test_docs_pattern",
+        "_test_docs_filename_pattern",
+        "_test_docs_function_pattern",
+        "_indent_size",
+    ):
+        monkeypatch.setattr(Plugin, name, getattr(Plugin, name))
+
+    def run(args: Sequence[str]) -> tuple[str, int]:
+        """Run flake8.
+
+        Args:
+            args: The arguments to pass to flake8.
+
+        Returns:
+            The stdout and exit code of flake8.
+        """
+        try:
+            returncode = flake8_cli.main(args)
+        # Invalid arguments exit while the arguments are parsed, the exit code is mapped the same
+        # way the interpreter maps it to the exit status of a process
+        except SystemExit as exc:
+            returncode = 0 if exc.code is None else exc.code if isinstance(exc.code, int) else 1
+        return capsys.readouterr().out, returncode
+
+    return run
+
+
+@pytest.fixture(name="config_file", scope="session")
+def fixture_config_file(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Create an empty flake8 configuration file that is shared by all the tests.
+
+    Args:
+        tmp_path_factory: Used to create the directory for the file.
+
+    Returns:
+        The path to the configuration file.
+    """
+    (config_file := tmp_path_factory.mktemp("config") / ".flake8").touch()
+    return config_file
+
+
+def test_fail(tmp_path: Path, run_flake8: Flake8Runner):
     """
     given: file with Python code that fails the linting
     when: flake8 is run against the code
@@ -60,18 +126,13 @@ def test_fail(tmp_path: Path):
     """
     code_file = create_code_file('\ndef test_():\n    """Docstring."""\n', "test_.py", tmp_path)
 
-    with subprocess.Popen(
-        f"{sys.executable} -m flake8 {code_file}",
-        stdout=subprocess.PIPE,
-        shell=True,
-    ) as proc:
-        stdout = proc.communicate()[0].decode(encoding="utf-8")
+    stdout, returncode = run_flake8((str(code_file),))
 
-        assert (
-            f"{INVALID_CODE} the docstring should start with an empty line{INVALID_MSG_POSTFIX}"
-            in stdout
-        )
-        assert proc.returncode
+    assert (
+        f"{INVALID_CODE} the docstring should start with an empty line{INVALID_MSG_POSTFIX}"
+        in stdout
+    )
+    assert returncode
 
 
 @pytest.mark.parametrize(
@@ -83,7 +144,7 @@ def test_fail(tmp_path: Path):
         pytest.param("given/when/then/extra", id="4 provided"),
     ],
 )
-def test_invalid_docs_pattern(docs_pattern: str, tmp_path: Path):
+def test_invalid_docs_pattern(docs_pattern: str, tmp_path: Path, run_flake8: Flake8Runner):
     """
     given: invalid value for the docs pattern argument
     when: flake8 is run against the code
@@ -99,15 +160,9 @@ def test_():
 '''
     code_file = create_code_file(code, "test_.py", tmp_path)
 
-    with subprocess.Popen(
-        f"{sys.executable} -m flake8 {code_file} {TEST_DOCS_PATTERN_ARG_NAME} {docs_pattern}",
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-        shell=True,
-    ) as proc:
-        proc.communicate()
+    _, returncode = run_flake8((str(code_file), TEST_DOCS_PATTERN_ARG_NAME, docs_pattern))
 
-        assert proc.returncode
+    assert returncode
 
 
 @pytest.mark.parametrize(
@@ -123,7 +178,7 @@ def test_():
     """
 ''',
             "test_.py",
-            "",
+            (),
             id="default",
         ),
         pytest.param(
@@ -136,7 +191,7 @@ def test_():
     """
 ''',
             "test_.py",
-            f"{TEST_DOCS_PATTERN_ARG_NAME} given/when/then",
+            (TEST_DOCS_PATTERN_ARG_NAME, "given/when/then"),
             id="custom docs pattern",
         ),
         pytest.param(
@@ -149,7 +204,7 @@ def test_():
     """
 ''',
             "_test.py",
-            f"{TEST_DOCS_FILENAME_PATTERN_ARG_NAME} .*_test.py",
+            (TEST_DOCS_FILENAME_PATTERN_ARG_NAME, ".*_test.py"),
             id="custom filename pattern",
         ),
         pytest.param(
@@ -162,7 +217,7 @@ def _test():
     """
 ''',
             "test_.py",
-            f"{TEST_DOCS_FUNCTION_PATTERN_ARG_NAME} .*_test",
+            (TEST_DOCS_FUNCTION_PATTERN_ARG_NAME, ".*_test"),
             id="custom function pattern",
         ),
         pytest.param(
@@ -171,7 +226,7 @@ def test_():  # noqa: {MISSING_CODE}
     pass
 """,
             "test_.py",
-            "",
+            (),
             id=f"{MISSING_CODE} disabled",
         ),
         pytest.param(
@@ -180,7 +235,7 @@ def test_():
     """"""  # noqa: {INVALID_CODE},D419
 ''',
             "test_.py",
-            "",
+            (),
             id=f"{INVALID_CODE} disabled",
         ),
         pytest.param(
@@ -196,46 +251,47 @@ def test_():
   """
 ''',
             "test_.py",
-            "--indent-size 2",
+            (INDENT_SIZE_ARN_NAME, "2"),
             id="changed indentation",
         ),
     ],
 )
-def test_pass(code: str, filename: str, extra_args: str, tmp_path: Path):
+def test_pass(  # pylint: disable=too-many-arguments
+    code: str,
+    filename: str,
+    extra_args: tuple[str, ...],
+    tmp_path: Path,
+    run_flake8: Flake8Runner,
+    config_file: Path,
+):
     """
     given: file with Python code that passes the linting
     when: flake8 is run against the code
     then: the process exits with zero code and empty stdout
     """
     code_file = create_code_file(code, filename, tmp_path)
-    (config_file := tmp_path / ".flake8").touch()
 
-    with subprocess.Popen(
-        (
-            f"{sys.executable} -m flake8 {code_file} {extra_args} --ignore D205,D400,D103 "
-            f"--config {config_file}"
-        ),
-        stdout=subprocess.PIPE,
-        shell=True,
-    ) as proc:
-        stdout = proc.communicate()[0].decode(encoding="utf-8")
+    stdout, returncode = run_flake8(
+        (str(code_file), *extra_args, *_IGNORE_ARGS, "--config", str(config_file))
+    )
 
-        assert not stdout, stdout
-        assert not proc.returncode
+    assert not stdout, stdout
+    assert not returncode
 
 
+@pytest.mark.slow
 def test_self():
     """
     given: working linter
     when: flake8 is run against the tests of the linter
     then: the process exits with zero code and empty stdout
     """
-    with subprocess.Popen(
-        f"{sys.executable} -m flake8 tests/ --ignore D205,D400,D103",
+    proc = subprocess.run(
+        (sys.executable, "-m", "flake8", "tests/", *_IGNORE_ARGS),
         stdout=subprocess.PIPE,
-        shell=True,
-    ) as proc:
-        stdout = proc.communicate()[0].decode(encoding="utf-8")
+        text=True,
+        check=False,
+    )
 
-        assert not stdout, stdout
-        assert not proc.returncode
+    assert not proc.stdout, proc.stdout
+    assert not proc.returncode
@@ -1,8 +1,13 @@
 """Unit tests for plugin."""
 
+# The test cases are kept together in a single table
+# pylint: disable=too-many-lines
+
 from __future__ import annotations
 
 import ast
+import re
+from functools import lru_cache
 
 import hypothesis
 import pytest
@@ -15,10 +20,24 @@ from flake8_test_docs import (
     INVALID_CODE,
     INVALID_MSG_POSTFIX,
     MISSING_MSG,
+    TEST_DOCS_FUNCTION_PATTERN_DEFAULT,
     Plugin,
 )
 
 
+@lru_cache(maxsize=None)
+def _parse(code: str) -> ast.Module:
+    """Parse code, the tree is shared by tests with the same code since the plugin only reads it.
+
+    Args:
+        code: The code to parse.
+
+    Returns:
+        The AST syntax tree for the code.
+    """
+    return ast.parse(code)
+
+
 def _result(code: str, filename: str = "test_.py") -> tuple[str, ...]:
     """Generate linting results.
 
@@ -29,7 +48,7 @@ def _result(code: str, filename: str = "test_.py") -> tuple[str, ...]:
     Returns:
         The linting result.
     """
-    tree = ast.parse(code)
+    tree = _parse(code)
     plugin = Plugin(tree, filename)
     return tuple(f"{line}:{col} {msg}" for line, col, msg, _ in plugin.run())
 
@@ -55,6 +74,40 @@ class TestSuite:
             (f"3:4 {MISSING_MSG}",),
             id="missing docstring deeper nesting",
         ),
+        pytest.param(
+            """
+if True:
+    def test_():
+        pass
+else:
+    try:
+        def test_():
+            pass
+    except Exception:
+        def test_():
+            pass
+    finally:
+        for _ in ():
+            with open("") as file:
+                def test_():
+                    pass
+""",
+            (
+                f"3:4 {MISSING_MSG}",
+                f"7:8 {MISSING_MSG}",
+                f"10:8 {MISSING_MSG}",
+                f"15:16 {MISSING_MSG}",
+            ),
+            id="missing docstring nested in statements",
+        ),
+        pytest.param(
+            """
+async def test_():
+    pass
+""",
+            (f"2:0 {MISSING_MSG}",),
+            id="missing docstring async",
+        ),
         pytest.param(
             '''
 def test_():
@@ -249,6 +302,34 @@ def test_():
         ),
         pytest.param(
             '''
+def test_():
+    """
+    arrange: line 1"""
+''',
+            (
+                f'3:4 {INVALID_CODE} the docstring should include "act" describing the test '
+                f"{ACT_DESCRIPTION} on line 2 of the docstring"
+                f"{INVALID_MSG_POSTFIX}",
+            ),
+            id="invalid docstring act missing docstring ends",
+        ),
+        pytest.param(
+            '''
+def test_():
+    """
+    arrange: line 1\x0c    act: line 2
+    assert: line 3
+    """
+''',
+            (
+                f'3:4 {INVALID_CODE} the docstring should include "act" describing the test '
+                f"{ACT_DESCRIPTION} on line 2 of the docstring"
+                f"{INVALID_MSG_POSTFIX}",
+            ),
+            id="invalid docstring act after form feed",
+        ),
+        pytest.param(
+            '''
 def test_():
     """
     arrange: line 1
@@ -413,11 +494,12 @@ def test_():
     """
     arrange: line 1
     act: line 2
+
 assert"""
 ''',
             (
-                f"3:4 {INVALID_CODE} the indentation of line 3 of the docstring should match the "
-                "indentation of the docstring"
+                f"3:4 {INVALID_CODE} there should not be an empty line in the test "
+                f"{ACT_DESCRIPTION} description on line 3 of the docstring"
                 f"{INVALID_MSG_POSTFIX}",
             ),
             id="invalid docstring assert empty line before",
@@ -780,6 +862,18 @@ class TestSuite:
             (),
             id="valid docstring deeper indentation",
         ),
+        pytest.param(
+            '''
+async def test_():
+    """
+    arrange: line 1
+    act: line 2
+    assert: line 3
+    """
+''',
+            (),
+            id="valid docstring async",
+        ),
         pytest.param(
             """
 def function_1():
@@ -829,26 +923,78 @@ def test_():
     assert _result(code, filename) == expected_result
 
 
-_TEST_DOCS_SECTION_PREFIX_REGEX = r"    "
-_TEST_DOCS_WORD_REGEX = r"(\w+ ?)+"
-_TEST_DOCS_SECTION_START_REGEX = rf": {_TEST_DOCS_WORD_REGEX}\n"
-_TEST_DOCS_OPTIONAL_LINE_REGEX = (
-    rf"({_TEST_DOCS_SECTION_PREFIX_REGEX * 2}{_TEST_DOCS_WORD_REGEX}\n)*"
-)
-_TEST_DOCS_REGEX = (
-    f"^\n"
-    f"{_TEST_DOCS_SECTION_PREFIX_REGEX}arrange{_TEST_DOCS_SECTION_START_REGEX}"
-    f"{_TEST_DOCS_OPTIONAL_LINE_REGEX}"
-    f"{_TEST_DOCS_SECTION_PREFIX_REGEX}act{_TEST_DOCS_SECTION_START_REGEX}"
-    f"{_TEST_DOCS_OPTIONAL_LINE_REGEX}"
-    f"{_TEST_DOCS_SECTION_PREFIX_REGEX}assert{_TEST_DOCS_SECTION_START_REGEX}"
-    f"{_TEST_DOCS_OPTIONAL_LINE_REGEX}"
-    f"{_TEST_DOCS_SECTION_PREFIX_REGEX}$"
+@pytest.mark.parametrize(
+    "function_pattern, expected_result",
+    [
+        pytest.param(TEST_DOCS_FUNCTION_PATTERN_DEFAULT, (f"2:0 {MISSING_MSG}",), id="default"),
+        pytest.param("check_.*", (f"5:0 {MISSING_MSG}",), id="custom"),
+        pytest.param("_.*", (), id="custom no match"),
+        pytest.param("check_.*_", (), id="custom not prefix"),
+        pytest.param("(test|check)_.*", (f"2:0 {MISSING_MSG}", f"5:0 {MISSING_MSG}"), id="both"),
+    ],
 )
+def test_plugin_function_pattern(
+    function_pattern: str, expected_result: tuple[str, ...], monkeypatch: pytest.MonkeyPatch
+):
+    """
+    given: code and function pattern
+    when: linting is run on the code
+    then: the expected result is returned
+    """
+    monkeypatch.setattr(Plugin, "_test_docs_function_pattern", re.compile(function_pattern))
+    code = """
+def test_():
+    pass
 
+def check_():
+    pass
+"""
+
+    assert _result(code) == expected_result
 
-@hypothesis.settings(suppress_health_check=(hypothesis.HealthCheck.too_slow,))
-@hypothesis.given(strategies.from_regex(_TEST_DOCS_REGEX))
+
+_TEST_DOCS_SECTION_PREFIX = "    "
+_TEST_DOCS_WORDS = strategies.lists(
+    strategies.tuples(
+        # Equivalent to \w+ which is much slower to generate with from_regex
+        strategies.text(
+            strategies.characters(whitelist_categories=("L", "N"), whitelist_characters="_"),
+            min_size=1,
+        ),
+        strategies.sampled_from(("", " ")),
+    ),
+    min_size=1,
+).map(lambda words: "".join(f"{word}{space}" for word, space in words))
+
+
+@strategies.composite
+def _test_docs(draw: strategies.DrawFn) -> str:
+    """Generate docstrings that follow the default docs pattern.
+
+    Args:
+        draw: Used to draw the descriptions of each section.
+
+    Returns:
+        The generated docstring.
+    """
+    sections = "".join(
+        f"{_TEST_DOCS_SECTION_PREFIX}{name}: {draw(_TEST_DOCS_WORDS)}\n"
+        + "".join(
+            f"{_TEST_DOCS_SECTION_PREFIX * 2}{line}\n"
+            for line in draw(strategies.lists(_TEST_DOCS_WORDS))
+        )
+        for name in ("arrange", "act", "assert")
+    )
+    return f"\n{sections}{_TEST_DOCS_SECTION_PREFIX}"
+
+
+@pytest.mark.slow
+# A failure is reported with the generated docstring rather than spending time shrinking it
+@hypothesis.settings(
+    suppress_health_check=(hypothesis.HealthCheck.too_slow,),
+    phases=(hypothesis.Phase.explicit, hypothesis.Phase.reuse, hypothesis.Phase.generate),
+)
+@hypothesis.given(_test_docs())
 def test_hypothesis(source: str):
     """
     given: generated docstring